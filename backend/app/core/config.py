@@ -19,6 +19,17 @@ class Settings(BaseSettings):
     LLM_MAX_TOKENS: int = 2048
     LLM_TEMPERATURE: float = 0.2
 
+    # Saved videos live in MEDIA_ROOT/<LIBRARY_DIRNAME>/
+    LIBRARY_DIRNAME: str = "library"
+    EXPORT_FINAL_QUALITY: str = Field("high", description="quality for background final renders")
+
+    # Disk janitor (quotas in MB; None disables the check)
+    JANITOR_ENABLED: bool = True
+    JANITOR_INTERVAL_SECONDS: int = 600
+    JANITOR_SESSION_QUOTA_MB: Optional[int] = None
+    JANITOR_GLOBAL_QUOTA_MB: Optional[int] = None
+    JANITOR_SESSION_MAX_IDLE_HOURS: Optional[float] = 72.0
+
     # CORS
     CORS_ALLOW_ORIGINS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
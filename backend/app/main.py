@@ -2,7 +2,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from .core.config import settings
-from .routers import chat, render, settings as settings_router, media, models
+from .routers import chat, render, settings as settings_router, media, models, library, janitor as janitor_router
+from .services.janitor import janitor
 
 app = FastAPI(title="AutoManim API", version="0.1.0")
 
@@ -22,11 +23,23 @@ app.include_router(render.router, prefix="/api")
 app.include_router(settings_router.router, prefix="/api")
 app.include_router(media.router, prefix="/api")
 app.include_router(models.router, prefix="/api")
+app.include_router(library.router, prefix="/api")
+app.include_router(janitor_router.router, prefix="/api")
 
 # Initialize LLM service
 from .services.llm import llm_service
 
 
+@app.on_event("startup")
+async def start_janitor():
+    janitor.start()
+
+
+@app.on_event("shutdown")
+async def stop_janitor():
+    await janitor.stop()
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
@@ -17,22 +17,55 @@ class GenerateResponse(BaseModel):
     code: Union[str, int]  # code string or -1
     scene_class: Optional[str] = None
 
+class DraftOptions(BaseModel):
+    """Trade fidelity for latency on previews."""
+    fps: int = Field(15, gt=0)
+    scale: float = Field(0.5, gt=0, le=1, description="resolution multiplier")
+    max_wait: Optional[float] = Field(0.25, gt=0, description="clamp self.wait() to this many seconds; None keeps them")
+    parent_code: Optional[str] = None  # skip animations unchanged since this version
+    last_frame_only: bool = False  # PNG of the final frame instead of a video
+
+class DraftReport(BaseModel):
+    render_seconds: float
+    baseline_seconds: Optional[float] = None  # standard preview of the same code
+    speedup: Optional[float] = None
+    estimated: bool = False  # baseline scaled from another size/fps or taken from the parent version
+    skipped_animations: int = 0
+
 class RenderRequest(BaseModel):
     session_id: str
     code: str
     scene_class: Optional[str] = None
     settings: Optional[VideoSettings] = None
     preview: bool = True
+    tab_id: Optional[str] = None  # a newer render for the same session/tab cancels this one
+    draft: Optional[DraftOptions] = None
 
 class RenderResponse(BaseModel):
     success: bool
     video_url: Optional[str] = None
     log: Optional[str] = None
+    superseded: bool = False
+    draft: Optional[DraftReport] = None
 
 class SaveVideoRequest(BaseModel):
     session_id: str
     filename: str
-    source_path: str
+    source_path: str  # video_url returned by /render, e.g. /media/<session>/preview-<hash>.mp4
+    # Optional: re-render the same code at final quality in the background
+    code: Optional[str] = None
+    scene_class: Optional[str] = None
+    settings: Optional[VideoSettings] = None
+    final_render: bool = False
+    # Library names are global; replacing an existing entry must be asked for
+    overwrite: bool = False
+
+class ExportStatus(BaseModel):
+    name: str
+    url: str
+    status: str = Field("preview", description="preview|rendering|final|failed")
+    version: int = 1  # bumped each time the entry's file is replaced
+    log: Optional[str] = None
 
 class MediaItem(BaseModel):
     name: str
@@ -3,29 +3,12 @@ from ..models.schemas import GenerateRequest, GenerateResponse
 from ..services.llm import LLMService
 from ..core.session_store import SessionStore
 from ..utils.code_utils import sanitize_code, extract_scene_class
+from ..core.prompts import SYSTEM_PROMPT
 
 router = APIRouter(tags=["chat"])
 from ..services.llm import llm_service
 store = SessionStore.get()
 
-SYSTEM_PROMPT = (
-    "You are a Manim code generator.\n"
-    "Rules:\n"
-    "- If the user request is NOT about Manim, reply with -1 and nothing else.\n"
-    "- Think thoroughly about what the user is asking before replying.\n"
-    "- OUTPUT ONLY Python code (no backticks, no comments, no text).\n"
-    "- The code must include: from manim import *\n"
-    "- Define exactly one Scene class named GeneratedScene(Scene) with a construct(self) method.\n"
-    "- The code must be self-contained and runnable via manim CLI.\n"
-    "- Use only animations available in Manim v0.19.x.\n"
-    "- CRITICAL: Use MathTex(...) for ALL mathematical formulas, equations, variables, and LaTeX symbols (e.g., F_n, \\frac, ^). \n"
-    "- CRITICAL: Use Tex(...) ONLY for plain text explanations. NEVER put math mode syntax (like _, ^, \\) inside Tex() without $...$ delimiters.\n"
-    "- CRITICAL: When using .animate, you MUST CALL the method. Example: `self.play(obj.animate.shift(UP))` is CORRECT. `self.play(obj.animate.shift, UP)` is WRONG (causes TypeError).\n"
-    "- Conversation is cumulative: incorporate ALL prior user instructions unless the latest explicitly replaces them.\n"
-    "  Incorporate ALL prior user instructions unless the latest explicitly replaces them.\n"
-    "  For requests like 'expand it' or 'transform it', first create the earlier object(s) from history, then apply the new animation.\n"
-    "  Always output the full, final scene code that includes previous steps and the new change.\n"
-)
 
 @router.post("/generate", response_model=GenerateResponse)
 async def generate(req: GenerateRequest):
@@ -0,0 +1,20 @@
+import asyncio
+from fastapi import APIRouter
+from ..services.janitor import janitor
+
+router = APIRouter(tags=["janitor"])
+
+@router.get("/janitor/report")
+async def report():
+    """Dry run: what a sweep would delete right now."""
+    result = await asyncio.to_thread(janitor.sweep, True)
+    return result.to_dict()
+
+@router.post("/janitor/sweep")
+async def sweep():
+    result = await asyncio.to_thread(janitor.sweep)
+    return result.to_dict()
+
+@router.get("/janitor/metrics")
+async def metrics():
+    return janitor.metrics
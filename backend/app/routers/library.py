@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+from ..models.schemas import SaveVideoRequest, ExportStatus
+from ..services.library import library
+
+router = APIRouter(tags=["library"])
+
+@router.post("/export", response_model=ExportStatus)
+async def export_video(req: SaveVideoRequest):
+    """Save a rendered preview under a name (hardlink, no re-render) and
+    optionally queue a final-quality render that replaces it when done."""
+    try:
+        return await library.export(req)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Source video not found")
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=f"Export {e} already exists; set overwrite to replace it")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export/{name}", response_model=ExportStatus)
+async def export_status(name: str, after_version: int = 0, wait: float = 0.0):
+    """Poll an export. With wait > 0, blocks up to that many seconds until the
+    entry moves past after_version or its background render finishes."""
+    if wait > 0:
+        entry = await library.wait(name, after_version, min(wait, 60.0))
+    else:
+        entry = library.get(name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return entry
@@ -1,19 +1,21 @@
 from fastapi import APIRouter
 from ..models.schemas import RenderRequest, RenderResponse
-from ..services.manim_runner import ManimRunner
+from ..services.manim_runner import ManimRunner, SUPERSEDED_LOG
 
 router = APIRouter(tags=["render"])
 runner = ManimRunner()
 
 @router.post("/render", response_model=RenderResponse)
 async def render(req: RenderRequest):
-    success, path, log = await runner.render(
+    success, path, log, draft_report = await runner.render_with_report(
         session_id=req.session_id,
         code=req.code,
         scene_class=req.scene_class,
         video_settings=req.settings,
         preview=req.preview,
+        tab_id=req.tab_id,
+        draft=req.draft,
     )
     if not success:
-        return RenderResponse(success=False, log=log)
-    return RenderResponse(success=True, video_url=path, log=log)
+        return RenderResponse(success=False, log=log, superseded=log == SUPERSEDED_LOG)
+    return RenderResponse(success=True, video_url=path, log=log, draft=draft_report)
@@ -0,0 +1,300 @@
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import RLock
+from typing import Dict, List, Optional, Set
+
+from ..core.config import settings
+
+# Files directly under media/<session>/ with these suffixes are final outputs;
+# everything else there (jobs/<job>/ render dirs, partial_movie_files, ...) is an intermediate.
+FINAL_SUFFIXES = (".mp4", ".png")
+
+MB = 1024 * 1024
+
+# Per-root holding area: paths are renamed here under the lock, then removed outside it
+TRASH_DIRNAME = ".janitor-trash"
+
+
+def _size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for p in path.rglob("*"):
+        try:
+            if p.is_file():
+                total += p.stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+def _mtime(path: Path) -> float:
+    latest = path.stat().st_mtime
+    if path.is_dir():
+        for p in path.rglob("*"):
+            try:
+                latest = max(latest, p.stat().st_mtime)
+            except OSError:
+                continue
+    return latest
+
+
+@dataclass
+class Deletion:
+    path: str
+    bytes: int
+    reason: str
+
+
+@dataclass
+class SweepReport:
+    dry_run: bool
+    deletions: List[Deletion] = field(default_factory=list)
+    total_bytes_before: int = 0
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return sum(d.bytes for d in self.deletions)
+
+    def to_dict(self) -> Dict:
+        return {
+            "dry_run": self.dry_run,
+            "total_bytes_before": self.total_bytes_before,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "deletions": [d.__dict__ for d in self.deletions],
+        }
+
+
+class Janitor:
+    """Reclaims disk under MEDIA_ROOT and WORK_ROOT.
+
+    - a render job's intermediates are dropped as soon as it finishes
+    - idle sessions past the retention age are removed entirely
+    - sessions over their quota lose their oldest videos first
+    - if the global quota is exceeded, least recently used sessions are evicted
+    Sessions with a render in flight are never touched.
+    """
+
+    def __init__(self) -> None:
+        self.media_root = Path(settings.MEDIA_ROOT)
+        self.work_root = Path(settings.WORK_ROOT)
+        self._lock = RLock()
+        self._active: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, float] = {
+            "sweeps": 0,
+            "bytes_reclaimed_total": 0,
+            "files_deleted_total": 0,
+            "bytes_reclaimed_intermediates": 0,
+            "bytes_reclaimed_retention": 0,
+            "bytes_reclaimed_session_quota": 0,
+            "bytes_reclaimed_global_quota": 0,
+            "last_sweep_at": 0,
+            "last_sweep_bytes": 0,
+        }
+
+    # Render bookkeeping
+    def begin(self, session_id: str) -> None:
+        with self._lock:
+            self._active[session_id] = self._active.get(session_id, 0) + 1
+
+    def end(self, session_id: str) -> None:
+        with self._lock:
+            n = self._active.get(session_id, 0) - 1
+            if n > 0:
+                self._active[session_id] = n
+            else:
+                self._active.pop(session_id, None)
+
+    def is_active(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._active
+
+    # Deletion helpers
+    def _trash(self, path: Path) -> Path:
+        root = self.media_root if self.media_root in path.parents else self.work_root
+        trash = root / TRASH_DIRNAME
+        trash.mkdir(exist_ok=True)
+        return trash / f"{path.name}.{uuid.uuid4().hex}"
+
+    def _delete(self, path: Path, reason: str, report: SweepReport, session_id: Optional[str] = None) -> int:
+        """Delete path (or, in a dry run, plan to) and return the bytes freed.
+
+        Paths already planned in this report, or under one, count as zero, and
+        a directory's size excludes files already planned inside it, so dry
+        runs add up to what a real sweep reclaims.
+
+        With session_id, the path is skipped if that session has a render in
+        flight. Only the active check and a rename into the trash happen under
+        _lock; the actual removal runs outside it, so begin()/end() on the
+        event loop never wait on a large rmtree."""
+        planned = [Path(d.path) for d in report.deletions]
+        if any(path == p or p in path.parents for p in planned):
+            return 0
+        try:
+            size = _size(path)
+        except OSError:
+            return 0
+        if report.dry_run:
+            size -= sum(d.bytes for d in report.deletions if path in Path(d.path).parents)
+            report.deletions.append(Deletion(path=str(path), bytes=size, reason=reason))
+            return size
+        try:
+            target = self._trash(path)
+            with self._lock:
+                if session_id is not None and self.is_active(session_id):
+                    return 0
+                os.rename(path, target)
+        except OSError:
+            return 0
+        report.deletions.append(Deletion(path=str(path), bytes=size, reason=reason))
+        if target.is_dir():
+            shutil.rmtree(target, ignore_errors=True)
+        else:
+            target.unlink(missing_ok=True)
+        with self._lock:
+            self.metrics["bytes_reclaimed_total"] += size
+            self.metrics["files_deleted_total"] += 1
+            self.metrics[f"bytes_reclaimed_{reason}"] += size
+        return size
+
+    def _intermediates(self, session_id: str) -> List[Path]:
+        out_dir = self.media_root / session_id
+        found = []
+        if out_dir.is_dir():
+            for p in out_dir.iterdir():
+                if p.is_file() and p.suffix in FINAL_SUFFIXES:
+                    continue
+                found.append(p)
+        work_dir = self.work_root / session_id
+        if work_dir.is_dir():
+            found.extend(work_dir.iterdir())
+        return found
+
+    def clean_job(self, session_id: str, job_id: str, dry_run: bool = False) -> SweepReport:
+        """Drop one finished render job's scripts, partial movie files and
+        Tex/text caches. Jobs are isolated, so this is safe while other
+        renders of the same session are still running."""
+        report = SweepReport(dry_run=dry_run)
+        for root in (self.media_root, self.work_root):
+            job_dir = root / session_id / "jobs" / job_id
+            if job_dir.exists():
+                self._delete(job_dir, "intermediates", report)
+        return report
+
+    def _sessions(self) -> Set[str]:
+        names: Set[str] = set()
+        for root in (self.media_root, self.work_root):
+            if root.is_dir():
+                names.update(p.name for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+        # Saved library videos are never garbage-collected
+        names.discard(settings.LIBRARY_DIRNAME)
+        return names
+
+    def _session_paths(self, session_id: str) -> List[Path]:
+        return [p for p in (self.media_root / session_id, self.work_root / session_id) if p.exists()]
+
+    def sweep(self, dry_run: bool = False) -> SweepReport:
+        report = SweepReport(dry_run=dry_run)
+        now = time.time()
+        max_idle = settings.JANITOR_SESSION_MAX_IDLE_HOURS
+        session_quota = (settings.JANITOR_SESSION_QUOTA_MB or 0) * MB
+        global_quota = (settings.JANITOR_GLOBAL_QUOTA_MB or 0) * MB
+
+        if not dry_run:
+            # Leftovers from a sweep interrupted between rename and removal
+            for root in (self.media_root, self.work_root):
+                shutil.rmtree(root / TRASH_DIRNAME, ignore_errors=True)
+
+        # session -> (last activity, bytes)
+        usage: Dict[str, List[float]] = {}
+        for sid in self._sessions():
+            paths = self._session_paths(sid)
+            if not paths:
+                continue
+            try:
+                usage[sid] = [max(_mtime(p) for p in paths), sum(_size(p) for p in paths)]
+            except OSError:
+                continue
+        report.total_bytes_before = int(sum(u[1] for u in usage.values()))
+
+        for sid in sorted(usage):
+            # Cheap early skip; _delete re-checks under the lock right before each rename
+            if self.is_active(sid):
+                continue
+            last_used, used = usage[sid]
+
+            # Age-based retention for idle sessions
+            if max_idle and now - last_used > max_idle * 3600:
+                for p in self._session_paths(sid):
+                    self._delete(p, "retention", report, sid)
+                usage.pop(sid)
+                continue
+
+            # Leftover intermediates from crashed or failed renders
+            for p in self._intermediates(sid):
+                used -= self._delete(p, "intermediates", report, sid)
+
+            # Per-session quota: oldest videos go first, the newest always stays
+            if session_quota and used > session_quota:
+                out_dir = self.media_root / sid
+                videos = sorted(
+                    (p for p in out_dir.glob("*") if p.is_file() and p.suffix in FINAL_SUFFIXES),
+                    key=lambda p: p.stat().st_mtime,
+                )
+                for p in videos[:-1]:
+                    if used <= session_quota:
+                        break
+                    used -= self._delete(p, "session_quota", report, sid)
+            usage[sid][1] = used
+
+        # Global quota: evict least recently used sessions
+        if global_quota:
+            total = sum(u[1] for u in usage.values())
+            for sid, (last_used, used) in sorted(usage.items(), key=lambda kv: kv[1][0]):
+                if total <= global_quota:
+                    break
+                if self.is_active(sid):
+                    continue
+                for p in self._session_paths(sid):
+                    total -= self._delete(p, "global_quota", report, sid)
+
+        if not dry_run:
+            with self._lock:
+                self.metrics["sweeps"] += 1
+                self.metrics["last_sweep_at"] = now
+                self.metrics["last_sweep_bytes"] = report.bytes_reclaimed
+        return report
+
+    # Background loop
+    async def _run(self) -> None:
+        while True:
+            try:
+                report = await asyncio.to_thread(self.sweep)
+                if report.deletions:
+                    print(f"[janitor] reclaimed {report.bytes_reclaimed} bytes ({len(report.deletions)} paths)")
+            except Exception as e:
+                print("[janitor] sweep failed:", repr(e))
+            await asyncio.sleep(settings.JANITOR_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None and settings.JANITOR_ENABLED:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Create singleton instance
+janitor = Janitor()
@@ -0,0 +1,171 @@
+import asyncio
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..core.config import settings
+from ..models.schemas import ExportStatus, SaveVideoRequest, VideoSettings
+from ..utils.file_utils import publish
+from .manim_runner import ManimRunner
+
+NAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class Library:
+    """Named, saved videos under MEDIA_ROOT/<LIBRARY_DIRNAME>/.
+
+    An export first promotes the already-rendered preview, then optionally
+    replaces it with a final-quality render done in the background. Clients
+    poll the entry (or long-poll with wait()) to pick up the upgrade.
+    """
+
+    def __init__(self) -> None:
+        self.media_root = Path(settings.MEDIA_ROOT)
+        self.root = self.media_root / settings.LIBRARY_DIRNAME
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.runner = ManimRunner()
+        self._entries: Dict[str, ExportStatus] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Serializes publishes to one entry so a stale render can't land over a newer export
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def entry_name(filename: str) -> str:
+        name = NAME_RE.sub("_", Path(filename).name).strip("._")
+        if name.lower().endswith(".mp4"):
+            name = name[:-4]
+        if not name:
+            raise ValueError("Invalid filename")
+        return name
+
+    def resolve_source(self, session_id: str, source_path: str) -> Path:
+        if (
+            not session_id
+            or "/" in session_id
+            or "\\" in session_id
+            or ".." in session_id
+            or session_id == settings.LIBRARY_DIRNAME
+        ):
+            raise ValueError("Invalid session_id")
+        rel = source_path.split("?", 1)[0]
+        if rel.startswith("/media/"):
+            rel = rel[len("/media/"):]
+        media_root = self.media_root.resolve()
+        path = (media_root / rel.lstrip("/")).resolve()
+        session_dir = (media_root / session_id).resolve()
+        if (
+            not path.is_relative_to(media_root)
+            or session_dir.parent != media_root
+            or session_dir not in path.parents
+            or path.suffix != ".mp4"
+        ):
+            raise ValueError("source_path must point to a video rendered in this session")
+        if not path.is_file():
+            raise FileNotFoundError(source_path)
+        return path
+
+    def get(self, name: str) -> Optional[ExportStatus]:
+        entry = self._entries.get(name)
+        if entry is None and (self.root / f"{name}.mp4").is_file():
+            # Saved before a restart; nothing pending for it
+            entry = ExportStatus(name=name, url=self._url(name), status="final")
+        return entry
+
+    def _url(self, name: str) -> str:
+        rel = (self.root / f"{name}.mp4").relative_to(self.media_root)
+        return f"/media/{rel}"
+
+    def _set(self, entry: ExportStatus) -> ExportStatus:
+        self._entries[entry.name] = entry
+        # Wake long-pollers; the next wait() arms a fresh event
+        event = self._changed.pop(entry.name, None)
+        if event is not None:
+            event.set()
+        return entry
+
+    def _update(self, name: str, **changes) -> ExportStatus:
+        return self._set(self._entries[name].model_copy(update=changes))
+
+    async def export(self, req: SaveVideoRequest) -> ExportStatus:
+        if req.final_render and not req.code:
+            raise ValueError("final_render requires code")
+        name = self.entry_name(req.filename)
+        src = self.resolve_source(req.session_id, req.source_path)
+        dst = self.root / f"{name}.mp4"
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            if not req.overwrite and (name in self._entries or dst.exists()):
+                raise FileExistsError(name)
+            # Any older final render is superseded, even one already publishing
+            previous = self._tasks.pop(name, None)
+            if previous is not None:
+                previous.cancel()
+            method = await asyncio.to_thread(publish, src, dst)
+
+            prev_entry = self._entries.get(name)
+            entry = self._set(ExportStatus(
+                name=name,
+                url=self._url(name),
+                status="preview",
+                version=prev_entry.version + 1 if prev_entry else 1,
+                log=f"saved preview via {method}",
+            ))
+
+            if req.final_render:
+                entry = self._update(name, status="rendering")
+                self._tasks[name] = asyncio.create_task(self._final_render(name, req))
+        return entry
+
+    async def _final_render(self, name: str, req: SaveVideoRequest) -> None:
+        base = req.settings or VideoSettings()
+        final_settings = base.model_copy(update={"quality": settings.EXPORT_FINAL_QUALITY})
+        try:
+            success, path, log = await self.runner.render(
+                session_id=f"export-{name}",
+                code=req.code,
+                scene_class=req.scene_class,
+                video_settings=final_settings,
+                preview=False,
+            )
+            if not success:
+                if self._tasks.get(name) is asyncio.current_task():
+                    self._update(name, status="failed", log=log)
+                return
+            src = self.media_root / path[len("/media/"):]
+            async with self._locks.setdefault(name, asyncio.Lock()):
+                # A newer export may have replaced this task while it rendered
+                if self._tasks.get(name) is not asyncio.current_task():
+                    return
+                await asyncio.to_thread(publish, src, self.root / f"{name}.mp4")
+                entry = self._entries[name]
+                self._update(name, status="final", version=entry.version + 1, log=log)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self._tasks.get(name) is asyncio.current_task():
+                self._update(name, status="failed", log=str(e))
+        finally:
+            if self._tasks.get(name) is asyncio.current_task():
+                self._tasks.pop(name, None)
+
+    async def wait(self, name: str, after_version: int, timeout: float) -> Optional[ExportStatus]:
+        """Return the entry once its version passes after_version or it stops
+        rendering, or whatever it is when timeout expires."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        entry = self.get(name)
+        while entry is not None and entry.version <= after_version and entry.status == "rendering":
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            event = self._changed.setdefault(name, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+            entry = self.get(name)
+        return entry
+
+
+# Create singleton instance
+library = Library()
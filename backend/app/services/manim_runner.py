@@ -1,28 +1,91 @@
 import asyncio
+import hashlib
 import os
 import re
 import shutil
 import subprocess
 import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import sys
 
 from ..core.config import settings
-from ..models.schemas import VideoSettings
-from ..utils.code_utils import extract_scene_class
+from ..models.schemas import DraftOptions, DraftReport, VideoSettings
+from ..utils.code_utils import count_unchanged_animations, extract_scene_class
+from .janitor import janitor
 
 DEFAULT_REQS = """
 from manim import *
 
 """
 
+# Log returned for a render that was cancelled because a newer one replaced it
+SUPERSEDED_LOG = "Render superseded by a newer request."
+
+# Prepended to draft scripts: collapse long self.wait() calls
+DRAFT_WAIT_PRELUDE = """
+from manim import Scene as _DraftScene
+_draft_orig_wait = _DraftScene.wait
+def _draft_wait(self, duration=1.0, *args, **kwargs):
+    return _draft_orig_wait(self, min(duration, {max_wait}), *args, **kwargs)
+_DraftScene.wait = _draft_wait
+
+"""
+
+# How many render timings to remember for draft speedup reports
+TIMINGS_MAX = 256
+
+
+@dataclass
+class RenderJob:
+    job_id: str
+    proc: Optional[asyncio.subprocess.Process] = None
+    superseded: bool = False
+    seconds: Optional[float] = None  # wall time of the manim run; None if reused
+    skipped_animations: int = 0
+
+    def kill(self) -> None:
+        if self.proc is not None and self.proc.returncode is None:
+            try:
+                self.proc.kill()
+            except ProcessLookupError:
+                pass
+
+    def supersede(self) -> None:
+        self.superseded = True
+        self.kill()
+
+
 class ManimRunner:
+    """Renders scenes with the manim CLI.
+
+    Each render runs in its own job directory (workdir/<session>/jobs/<job>/
+    and media/<session>/jobs/<job>/), so concurrent renders of one session
+    never share a script, config or output file. The finished video is
+    renamed into media/<session>/ under a content-hashed name, which is
+    atomic: the browser sees either the old file or the complete new one.
+    A new render for the same session/tab/kind cancels the one in flight.
+    Published videos are left in place (history nodes keep their own URL);
+    the janitor's quotas and retention reclaim them.
+
+    Draft renders (see DraftOptions) lower fps and resolution, clamp waits,
+    can skip animations unchanged since a parent version via manim's -n, or
+    save only the last frame as a PNG. Timings of non-draft renders are kept
+    so drafts can report their speedup.
+    """
+
     def __init__(self) -> None:
         self.media_root = Path(settings.MEDIA_ROOT)
         self.work_root = Path(settings.WORK_ROOT)
         self.media_root.mkdir(parents=True, exist_ok=True)
         self.work_root.mkdir(parents=True, exist_ok=True)
+        self._slots: Dict[Tuple[str, str, str], RenderJob] = {}
+        # digest(code, scene) -> (seconds, pixels per second of video) of the last non-draft render
+        self._timings: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
 
     async def render(
         self,
@@ -31,38 +94,109 @@ class ManimRunner:
         scene_class: Optional[str] = None,
         video_settings: Optional[VideoSettings] = None,
         preview: bool = True,
+        tab_id: Optional[str] = None,
+        draft: Optional[DraftOptions] = None,
     ) -> Tuple[bool, Optional[str], Optional[str]]:
-        work_dir = self.work_root / session_id
-        work_dir.mkdir(parents=True, exist_ok=True)
-        script_path = work_dir / "scene.py"
+        success, path, log, _ = await self.render_with_report(
+            session_id, code, scene_class, video_settings, preview, tab_id, draft
+        )
+        return success, path, log
 
+    async def render_with_report(
+        self,
+        session_id: str,
+        code: str,
+        scene_class: Optional[str] = None,
+        video_settings: Optional[VideoSettings] = None,
+        preview: bool = True,
+        tab_id: Optional[str] = None,
+        draft: Optional[DraftOptions] = None,
+    ) -> Tuple[bool, Optional[str], Optional[str], Optional[DraftReport]]:
+        """Like render(), plus a DraftReport for draft renders."""
+        job = RenderJob(job_id=uuid.uuid4().hex[:12])
+        kind = "draft" if draft else ("preview" if preview else "final")
+        slot = (session_id, tab_id or "", kind)
+        # Only tab-scoped renders supersede each other; tab-less ones run in parallel
+        if tab_id:
+            previous = self._slots.get(slot)
+            if previous is not None:
+                previous.supersede()
+            self._slots[slot] = job
+
+        # Mark the session busy so the janitor sweep leaves its files alone mid-render
+        janitor.begin(session_id)
+        success = False
+        try:
+            success, path, log = await self._render(job, session_id, code, scene_class, video_settings, preview, draft)
+            report = None
+            if draft is not None and success:
+                report = self._draft_report(job, code, scene_class, video_settings, draft)
+            return success, path, log, report
+        except asyncio.CancelledError:
+            job.kill()
+            raise
+        finally:
+            if self._slots.get(slot) is job:
+                self._slots.pop(slot)
+            janitor.end(session_id)
+            # Keep the published video, drop this job's script, partial movie files and Tex caches.
+            # Failed jobs are left for inspection until the next sweep.
+            if success or job.superseded:
+                await asyncio.to_thread(janitor.clean_job, session_id, job.job_id)
+
+    async def _render(
+        self,
+        job: RenderJob,
+        session_id: str,
+        code: str,
+        scene_class: Optional[str],
+        video_settings: Optional[VideoSettings],
+        preview: bool,
+        draft: Optional[DraftOptions] = None,
+    ) -> Tuple[bool, Optional[str], Optional[str]]:
         # Ensure imports present
         if "from manim import" not in code:
             code = DEFAULT_REQS + code
 
-        script_path.write_text(code)
-
         if not scene_class:
             scene_class = extract_scene_class(code) or "GeneratedScene"
 
-        # Determine output paths
-        out_name = "preview.mp4" if preview else "output.mp4"
+        q, width, height, fps = self._resolve_settings(video_settings)
+        extra_args = []
+        script = code
+        if draft is not None:
+            q = "l"
+            width, height, fps = self._draft_dims(width, height, draft)
+            # -q presets override the cfg pixel size; pass the scaled size explicitly
+            extra_args += ["-r", f"{width},{height}"]
+            if draft.max_wait is not None:
+                script = DRAFT_WAIT_PRELUDE.format(max_wait=draft.max_wait) + code
+            if draft.last_frame_only:
+                extra_args.append("-s")
+            elif draft.parent_code:
+                job.skipped_animations = count_unchanged_animations(code, draft.parent_code)
+                if job.skipped_animations:
+                    extra_args += ["-n", str(job.skipped_animations)]
+
+        # Determine output paths: identical code + settings map to the same file
+        if draft is None:
+            out_name = self._output_name(code, scene_class, q, width, height, fps, preview)
+        else:
+            digest = self._digest(script, scene_class, q, width, height, fps, *extra_args)
+            out_name = f"draft-{digest}.{'png' if draft.last_frame_only else 'mp4'}"
         out_dir = self.media_root / session_id
         out_dir.mkdir(parents=True, exist_ok=True)
         out_path = out_dir / out_name
+        rel = out_path.relative_to(self.media_root)
+        if out_path.is_file():
+            return True, f"/media/{rel}", "Identical render already published; reused it."
 
-        # Map quality
-        quality_map = {
-            "low": "l",
-            "medium": "m",
-            "high": "h",
-            "ultra": "k",
-        }
-        q = quality_map.get((video_settings.quality if video_settings else "low").lower(), "l")
-        width = video_settings.resolution_width if video_settings else 854
-        height = video_settings.resolution_height if video_settings else 480
-        fps = video_settings.fps if video_settings else 30
-
+        work_dir = self.work_root / session_id / "jobs" / job.job_id
+        work_dir.mkdir(parents=True, exist_ok=True)
+        job_media_dir = out_dir / "jobs" / job.job_id
+        job_media_dir.mkdir(parents=True, exist_ok=True)
+        script_path = work_dir / "scene.py"
+        script_path.write_text(script)
 
         # Prefer system 'manim' binary; fallback to 'python -m manim' if not on PATH
         manim_bin = shutil.which("manim")
@@ -73,11 +207,12 @@ class ManimRunner:
             "--fps", str(fps),
             "--format", "mp4",
             "--custom_folders",
-            "--media_dir", str(out_dir),
+            "--media_dir", str(job_media_dir),
             "--disable_caching",
+            *extra_args,
             str(script_path),
             scene_class,
-            "-o", out_path.name,
+            "-o", out_name,
         ]
 
         # Manim CLI uses resolutions by quality presets; to enforce WxH we can set pixel_height/width via cfg file
@@ -91,6 +226,10 @@ frame_rate = {fps}
         cfg_path.write_text(cfg)
         env_vars = {"MANIM_CONFIG_FILE": str(cfg_path)}
 
+        if job.superseded:
+            return False, None, SUPERSEDED_LOG
+
+        started = time.perf_counter()
         try:
             proc = await asyncio.create_subprocess_exec(
                 *cmd,
@@ -99,14 +238,113 @@ frame_rate = {fps}
                 stderr=asyncio.subprocess.STDOUT,
                 env={**os.environ, **env_vars},
             )
+            job.proc = proc
+            if job.superseded:
+                job.kill()
             stdout, _ = await proc.communicate()
             log = stdout.decode()
+            if job.superseded:
+                return False, None, SUPERSEDED_LOG
             if proc.returncode != 0:
                 return False, None, log
+            # Publish: the job dir lives under out_dir, so this rename is atomic
+            rendered = job_media_dir / out_name
+            if not rendered.is_file() and out_path.suffix == ".png":
+                # manim may name the frame after the scene; take whatever it saved
+                rendered = next(iter(sorted(job_media_dir.rglob("*.png"))), rendered)
+            if not rendered.is_file():
+                return False, None, log + f"\nmanim finished but {out_name} was not produced."
+            os.replace(rendered, out_path)
+            job.seconds = time.perf_counter() - started
+            if draft is None:
+                self._remember_timing(self._digest(code, scene_class), job.seconds, width * height * fps)
             # Return URL path
-            rel = out_path.relative_to(self.media_root)
             return True, f"/media/{rel}", log
         except FileNotFoundError:
             return False, None, "manim not found. Please install manim in the backend environment (or ensure 'python -m manim' works)."
         except Exception as e:
             return False, None, str(e)
+
+    @staticmethod
+    def _resolve_settings(video_settings: Optional[VideoSettings]) -> Tuple[str, int, int, int]:
+        # Map quality
+        quality_map = {
+            "low": "l",
+            "medium": "m",
+            "high": "h",
+            "ultra": "k",
+        }
+        q = quality_map.get((video_settings.quality if video_settings else "low").lower(), "l")
+        width = video_settings.resolution_width if video_settings else 854
+        height = video_settings.resolution_height if video_settings else 480
+        fps = video_settings.fps if video_settings else 30
+        return q, width, height, fps
+
+    @staticmethod
+    def _digest(*parts) -> str:
+        return hashlib.sha256("\0".join(str(p) for p in parts).encode()).hexdigest()[:16]
+
+    def _output_name(self, code: str, scene_class: str, q: str, width: int, height: int, fps: int, preview: bool) -> str:
+        digest = self._digest(code, scene_class, q, width, height, fps)
+        return f"{'preview' if preview else 'output'}-{digest}.mp4"
+
+    @staticmethod
+    def _draft_dims(width: int, height: int, draft: DraftOptions) -> Tuple[int, int, int]:
+        # Keep dimensions even; ffmpeg's yuv420p rejects odd sizes
+        width = max(2, int(width * draft.scale) // 2 * 2)
+        height = max(2, int(height * draft.scale) // 2 * 2)
+        return width, height, draft.fps
+
+    def _remember_timing(self, key: str, seconds: float, pixel_rate: int) -> None:
+        self._timings[key] = (seconds, pixel_rate)
+        self._timings.move_to_end(key)
+        while len(self._timings) > TIMINGS_MAX:
+            self._timings.popitem(last=False)
+
+    def _draft_report(
+        self,
+        job: RenderJob,
+        code: str,
+        scene_class: Optional[str],
+        video_settings: Optional[VideoSettings],
+        draft: DraftOptions,
+    ) -> DraftReport:
+        """Estimate what a standard preview of this code would have cost.
+
+        Exact when this code was last rendered (non-draft) at the preview's
+        size and fps; otherwise flagged estimated and scaled by pixel rate from
+        this code at another size or from the parent version. With no such
+        measurement, baseline and speedup are None.
+        """
+        _, width, height, fps = self._resolve_settings(video_settings)
+        preview_rate = width * height * fps
+
+        def timing(src: str) -> Optional[Tuple[float, int]]:
+            if "from manim import" not in src:
+                src = DEFAULT_REQS + src
+            scene = scene_class or extract_scene_class(src) or "GeneratedScene"
+            return self._timings.get(self._digest(src, scene))
+
+        seconds = job.seconds or 0.0
+        measured = timing(code)
+        estimated = False
+        if measured is None and draft.parent_code:
+            measured = timing(draft.parent_code)
+            estimated = measured is not None
+
+        baseline = None
+        if measured is not None:
+            base_seconds, rate = measured
+            baseline = base_seconds * preview_rate / rate
+            estimated = estimated or rate != preview_rate
+
+        speedup = None
+        if baseline is not None and seconds > 0:
+            speedup = round(baseline / seconds, 2)
+        return DraftReport(
+            render_seconds=round(seconds, 3),
+            baseline_seconds=round(baseline, 3) if baseline is not None else None,
+            speedup=speedup,
+            estimated=estimated,
+            skipped_animations=job.skipped_animations,
+        )
@@ -1,5 +1,6 @@
+import ast
 import re
-from typing import Optional
+from typing import List, Optional
 
 CODE_BLOCK_RE = re.compile(r"```(?:python)?\n(.*?)```", re.DOTALL)
 SCENE_CLASS_RE = re.compile(r"class\s+(\w+)\s*\(\s*Scene\s*\)")
@@ -38,3 +39,89 @@ def normalize_manim_apis(code: str) -> str:
     for bad, good in replacements.items():
         out = out.replace(bad, good)
     return out
+
+
+# self.<method>() calls that manim counts as one animation each
+ANIMATION_METHODS = {"play", "wait", "pause", "wait_until"}
+# self.<method>() calls known not to play anything
+STATIC_METHODS = {
+    "add", "remove", "clear", "bring_to_front", "bring_to_back",
+    "add_foreground_mobject", "add_foreground_mobjects",
+    "remove_foreground_mobject", "remove_foreground_mobjects",
+    "add_sound", "add_subcaption", "next_section",
+}
+BRANCHING_NODES = (
+    ast.For, ast.AsyncFor, ast.While, ast.If, ast.IfExp, ast.Try,
+    ast.With, ast.AsyncWith, ast.FunctionDef, ast.AsyncFunctionDef,
+    ast.Lambda, ast.comprehension, ast.Match,
+)
+
+
+def _split_construct(code: str):
+    """Return (construct body, dump of everything else) or None."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name == "construct":
+                    body = item.body
+                    item.body = []
+                    return body, ast.dump(tree)
+    return None
+
+
+def _animation_count(stmt: ast.stmt) -> Optional[int]:
+    """Animations one statement plays, or None if that can't be known statically
+    (calls under loops/branches, or calls to other self methods)."""
+    def self_call(node) -> Optional[str]:
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "self"
+        ):
+            return node.func.attr
+        return None
+
+    count = 0
+    branching = any(isinstance(n, BRANCHING_NODES) for n in ast.walk(stmt))
+    for node in ast.walk(stmt):
+        method = self_call(node)
+        if method is None or method in STATIC_METHODS:
+            continue
+        if method not in ANIMATION_METHODS or branching:
+            return None
+        count += 1
+    return count
+
+
+def count_unchanged_animations(code: str, parent_code: str) -> int:
+    """Number of leading animations in code identical to parent_code.
+
+    Only statements of construct() are compared, and only while everything
+    outside construct() is unchanged, so skipping that many animations never
+    hides an edit. Leaves at least one animation to render.
+    """
+    new = _split_construct(code)
+    old = _split_construct(parent_code)
+    if new is None or old is None or new[1] != old[1]:
+        return 0
+    new_body, old_body = new[0], old[0]
+
+    unchanged = 0
+    i = 0
+    while i < min(len(new_body), len(old_body)) and ast.dump(new_body[i]) == ast.dump(old_body[i]):
+        n = _animation_count(new_body[i])
+        if n is None:
+            break
+        unchanged += n
+        i += 1
+
+    rest: List[Optional[int]] = [_animation_count(stmt) for stmt in new_body[i:]]
+    if None not in rest and sum(rest) == 0:
+        # Nothing new would play; keep the last unchanged animation visible
+        unchanged = max(unchanged - 1, 0)
+    return unchanged
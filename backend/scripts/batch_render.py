@@ -0,0 +1,337 @@
+"""Offline batch pipeline: JSONL of prompts -> generated code -> rendered videos.
+
+Input lines look like:
+    {"id": "circle", "prompt": "make a red circle", "settings": {"quality": "medium"}, "preview": false}
+
+Only "prompt" is required; "id" must be unique within the file (repeats are
+reported as input failures). Generation (LLM) and rendering (manim) run as two
+concurrent stages with their own limits. Progress is checkpointed to
+<out>/checkpoint.jsonl so an interrupted run picks up where it stopped, and
+results (paths, timings, logs) are appended to <out>/manifest.jsonl. Finished
+videos are linked (or copied) into <out>/videos/, outside the janitor-managed
+MEDIA_ROOT, so manifest paths stay valid.
+
+Usage:
+    python backend/scripts/batch_render.py prompts.jsonl --out batch_out \
+        --gen-concurrency 4 --render-concurrency 2
+
+With LLM_PROVIDER=llama_cpp generation always runs one at a time: the single
+in-process Llama model is not thread-safe, so --gen-concurrency is ignored.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+# Allow running from repo root or scripts folder
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / 'backend'))
+
+from app.services.llm import llm_service  # noqa: E402
+from app.services.manim_runner import ManimRunner  # noqa: E402
+from app.models.schemas import VideoSettings  # noqa: E402
+from app.core.prompts import SYSTEM_PROMPT  # noqa: E402
+from app.utils.code_utils import sanitize_code, extract_scene_class  # noqa: E402
+from app.utils.file_utils import publish  # noqa: E402
+
+STOP = object()
+ID_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def item_id(entry: Dict[str, Any], lineno: int) -> str:
+    """Ids end up in file and session names, so keep them filesystem-safe;
+    a rewritten id gets a hash suffix so distinct ids can't collide."""
+    raw = entry.get("id", entry.get("request_id"))
+    if raw is None:
+        digest = hashlib.sha1(str(entry.get("prompt", "")).encode()).hexdigest()[:10]
+        return f"{lineno:05d}-{digest}"
+    raw = str(raw)
+    safe = ID_RE.sub("_", raw).strip("._")[:80]
+    if safe != raw:
+        safe = f"{safe}-{hashlib.sha1(raw.encode()).hexdigest()[:8]}"
+    return safe
+
+
+def load_items(path: Path) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Parse the input JSONL. Returns (items, invalid); invalid entries are
+    reported in the manifest instead of reaching the workers."""
+    items, invalid = [], []
+    # Ids key the checkpoint, session and output names, so they must be unique
+    seen: Dict[str, int] = {}
+    with path.open() as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+                if not isinstance(entry, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                invalid.append({"id": f"line-{lineno}", "prompt": None, "error": f"invalid JSON: {e}"})
+                continue
+            entry["id"] = item_id(entry, lineno)
+            if entry["id"] in seen:
+                invalid.append({
+                    "id": f"line-{lineno}",
+                    "prompt": entry.get("prompt"),
+                    "error": f"duplicate id {entry['id']!r} (first used on line {seen[entry['id']]})",
+                })
+                continue
+            seen[entry["id"]] = lineno
+            if not entry.get("prompt"):
+                invalid.append({"id": entry["id"], "prompt": None, "error": "missing prompt"})
+                continue
+            try:
+                entry["_settings"] = VideoSettings(**entry["settings"]) if entry.get("settings") else None
+            except (TypeError, ValidationError) as e:
+                invalid.append({"id": entry["id"], "prompt": entry["prompt"], "error": f"invalid settings: {e}"})
+                continue
+            items.append(entry)
+    return items, invalid
+
+
+class Checkpoint:
+    """Append-only record of per-item progress.
+
+    Each line is {"id", "stage": "generated"|"rendered", ...}. The latest line
+    for an id wins, so a rendered item is skipped entirely and a generated one
+    goes straight to the render stage on resume.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.state: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with path.open() as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line may be torn if the run was killed mid-write
+                        continue
+                    self.state[rec["id"]] = rec
+        self._fh = path.open("a")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.state.get(key)
+
+    def record(self, rec: Dict[str, Any]) -> None:
+        self.state[rec["id"]] = rec
+        self._fh.write(json.dumps(rec) + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class Manifest:
+    def __init__(self, path: Path) -> None:
+        self._fh = path.open("a")
+
+    def write(self, rec: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(rec) + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+def write_log(log_dir: Path, key: str, stage: str, text: Optional[str]) -> str:
+    log_dir.mkdir(parents=True, exist_ok=True)
+    path = log_dir / f"{key}.{stage}.log"
+    path.write_text(text or "")
+    return str(path)
+
+
+async def generate_one(item: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = item["prompt"]
+    started = time.perf_counter()
+    raw = await llm_service.generate_code(
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt=prompt,
+        messages=[{"role": "user", "content": prompt}],
+    )
+    elapsed = time.perf_counter() - started
+    code = sanitize_code(raw or "")
+    scene_class = extract_scene_class(code) if code.strip() != "-1" else None
+    return {
+        "ok": scene_class is not None,
+        "code": code,
+        "scene_class": scene_class,
+        "raw": raw,
+        "gen_seconds": round(elapsed, 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> int:
+    out_dir = Path(args.out).resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    log_dir = out_dir / "logs"
+    video_dir = out_dir / "videos"
+    checkpoint = Checkpoint(out_dir / "checkpoint.jsonl")
+    manifest = Manifest(out_dir / "manifest.jsonl")
+    runner = ManimRunner()
+
+    items, invalid = load_items(Path(args.input))
+    render_queue: asyncio.Queue = asyncio.Queue(maxsize=args.render_concurrency * 2)
+    gen_queue: asyncio.Queue = asyncio.Queue()
+    counts = {"skipped": 0, "rendered": 0, "failed": 0}
+
+    for item in items:
+        rec = checkpoint.get(item["id"])
+        if rec and rec.get("stage") == "rendered" and Path(rec["video_path"]).is_file():
+            counts["skipped"] += 1
+        elif rec and rec.get("stage") == "rendered" and not args.regenerate:
+            # Video was removed from <out>; re-render the checkpointed code
+            item["_generated"] = rec
+            await gen_queue.put(item)
+        elif rec and rec.get("stage") == "generated" and not args.regenerate:
+            item["_generated"] = rec
+            await gen_queue.put(item)
+        else:
+            await gen_queue.put(item)
+
+    for bad in invalid:
+        counts["failed"] += 1
+        manifest.write({**bad, "success": False, "failed_stage": "input"})
+        print(f"[batch] {bad['id']}: {bad['error']}")
+
+    print(f"[batch] {len(items)} items, {counts['skipped']} already done, {gen_queue.qsize()} to process")
+
+    def fail(item: Dict[str, Any], stage: str, log_path: str, timings: Dict[str, float]) -> None:
+        counts["failed"] += 1
+        manifest.write({
+            "id": item["id"],
+            "prompt": item["prompt"],
+            "success": False,
+            "failed_stage": stage,
+            "log_path": log_path,
+            **timings,
+        })
+        print(f"[batch] {item['id']}: {stage} failed ({log_path})")
+
+    async def generate_stage(item: Dict[str, Any]) -> None:
+        gen = item.pop("_generated", None)
+        if gen is None:
+            try:
+                result = await generate_one(item)
+            except Exception as e:
+                result = {"ok": False, "raw": repr(e), "gen_seconds": 0.0}
+            if not result["ok"]:
+                log_path = write_log(log_dir, item["id"], "generate", result.get("raw"))
+                fail(item, "generate", log_path, {"gen_seconds": result["gen_seconds"]})
+                return
+            gen = {
+                "id": item["id"],
+                "stage": "generated",
+                "code": result["code"],
+                "scene_class": result["scene_class"],
+                "gen_seconds": result["gen_seconds"],
+            }
+            checkpoint.record(gen)
+        await render_queue.put((item, gen))
+
+    async def render_stage(item: Dict[str, Any], gen: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        try:
+            success, path, log = await runner.render(
+                session_id=f"batch-{item['id']}",
+                code=gen["code"],
+                scene_class=gen.get("scene_class"),
+                video_settings=item["_settings"],
+                preview=bool(item.get("preview", False)),
+            )
+        except Exception as e:
+            success, path, log = False, None, repr(e)
+        render_seconds = round(time.perf_counter() - started, 3)
+        log_path = write_log(log_dir, item["id"], "render", log)
+        timings = {"gen_seconds": gen.get("gen_seconds"), "render_seconds": render_seconds}
+        if not success:
+            fail(item, "render", log_path, timings)
+            return
+        src = Path(runner.media_root) / path[len("/media/"):]
+        file_path = video_dir / f"{item['id']}{src.suffix}"
+        await asyncio.to_thread(publish, src, file_path)
+        checkpoint.record({**gen, "stage": "rendered", "video_path": str(file_path)})
+        manifest.write({
+            "id": item["id"],
+            "prompt": item["prompt"],
+            "success": True,
+            "scene_class": gen.get("scene_class"),
+            "video_path": str(file_path),
+            "log_path": log_path,
+            **timings,
+        })
+        counts["rendered"] += 1
+        print(f"[batch] {item['id']}: rendered {file_path} ({render_seconds}s)")
+
+    # Workers catch everything per item: a dead render worker would leave the
+    # generators blocked on the bounded render queue forever.
+    async def gen_worker() -> None:
+        while True:
+            try:
+                item = gen_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await generate_stage(item)
+            except Exception as e:
+                fail(item, "generate", write_log(log_dir, item["id"], "generate", repr(e)), {})
+
+    async def render_worker() -> None:
+        while True:
+            job = await render_queue.get()
+            if job is STOP:
+                return
+            item, gen = job
+            try:
+                await render_stage(item, gen)
+            except Exception as e:
+                fail(item, "render", write_log(log_dir, item["id"], "render", repr(e)), {})
+
+    renderers = [asyncio.create_task(render_worker()) for _ in range(args.render_concurrency)]
+    try:
+        await asyncio.gather(*(gen_worker() for _ in range(args.gen_concurrency)))
+        for _ in renderers:
+            await render_queue.put(STOP)
+        await asyncio.gather(*renderers)
+    finally:
+        for task in renderers:
+            task.cancel()
+        checkpoint.close()
+        manifest.close()
+
+    print(f"[batch] done: {counts['rendered']} rendered, {counts['failed']} failed, {counts['skipped']} skipped")
+    return 1 if counts["failed"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk prompt-to-video generation")
+    parser.add_argument("input", help="JSONL file with one {\"prompt\": ...} per line")
+    parser.add_argument("--out", default="batch_out", help="directory for checkpoint, manifest and logs")
+    parser.add_argument("--gen-concurrency", type=int, default=4, help="parallel LLM generations (forced to 1 for llama_cpp)")
+    parser.add_argument("--render-concurrency", type=int, default=2, help="parallel manim renders")
+    parser.add_argument("--regenerate", action="store_true", help="ignore checkpointed code for unrendered items")
+    args = parser.parse_args()
+    if args.gen_concurrency < 1 or args.render_concurrency < 1:
+        parser.error("concurrency limits must be >= 1")
+    if llm_service.provider == "llama_cpp" and args.gen_concurrency > 1:
+        # One shared Llama instance; concurrent to_thread calls into it aren't safe
+        print("[batch] llama_cpp provider: running generation with concurrency 1")
+        args.gen_concurrency = 1
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
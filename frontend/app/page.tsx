@@ -550,8 +550,18 @@ export default function HomePage() {
         scene_class: sceneName.replace(".py", "") || undefined,
         settings,
         preview: false,
+        tab_id: targetTabId,
       });
 
+      // A newer render for this tab replaced this one; let it update the UI
+      if (rendered.superseded) {
+        updateNodeInTab(targetTabId, newNode.id, {
+          logs: rendered.log || "Render superseded.",
+          status: "idle",
+        });
+        return;
+      }
+
       if (rendered.log) {
         setCurrentLogs(rendered.log);
       }
@@ -623,8 +633,11 @@ export default function HomePage() {
         scene_class: currentSceneName.replace(".py", "") || undefined,
         settings,
         preview: false,
+        tab_id: targetTab.id,
       });
 
+      if (rendered.superseded) return;
+
       if (rendered.log) {
         setCurrentLogs(rendered.log);
       }
@@ -47,3 +47,19 @@ export async function resetSession(baseUrl: string, sessionId: string) {
   if (!res.ok) throw new Error('Failed to reset session');
   return res.json();
 }
+
+export async function exportVideo(baseUrl: string, body: { session_id: string; filename: string; source_path: string; code?: string; scene_class?: string; settings?: any; final_render?: boolean; overwrite?: boolean; }) {
+  const res = await fetch(`${baseUrl}/api/export`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok) throw new Error('Failed to export video');
+  return res.json();
+}
+
+export async function getExport(baseUrl: string, name: string, afterVersion = 0, wait = 0) {
+  const res = await fetch(`${baseUrl}/api/export/${encodeURIComponent(name)}?after_version=${afterVersion}&wait=${wait}`);
+  if (!res.ok) throw new Error('Failed to get export');
+  return res.json();
+}